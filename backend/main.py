@@ -3,14 +3,20 @@ Real-time Price Monitor Backend using FastAPI and DataBento Live API
 """
 
 import asyncio
+import base64
+import logging
 import os
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Literal, Optional
 import databento as db
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+from starlette.websockets import WebSocketState
 from datetime import datetime
-import json
+import orjson
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -19,7 +25,24 @@ from pathlib import Path
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-app = FastAPI(title="Real-time Price Monitor")
+# Per-record logging is DEBUG only; set LOG_LEVEL=DEBUG to trace the stream
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+_log_level = getattr(logging, LOG_LEVEL, None)
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.INFO)
+logger = logging.getLogger(__name__)
+if not isinstance(_log_level, int):
+    logger.warning("Unknown LOG_LEVEL %r, using INFO", LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one DataBento session across all clients for the app's lifetime"""
+    app.state.feed = PriceFeed(DATABENTO_API_KEY)
+    yield
+    await app.state.feed.close()
+
+
+app = FastAPI(title="Real-time Price Monitor", lifespan=lifespan)
 
 # CORS configuration for React frontend
 app.add_middleware(
@@ -35,6 +58,22 @@ DATABENTO_API_KEY = os.getenv("DATABENTO_API_KEY")
 DATASET = "GLBX.MDP3"  # Example: CME Globex
 SCHEMA = "mbp-1"  # Market by Price (Level 1)
 
+# Prices are sent as DataBento fixed-point integers (1 unit = 1e-9); the
+# frontend scales them for display. UNDEF_PRICE marks an empty book side.
+UNDEF_PRICE = db.UNDEF_PRICE
+
+# orjson options for SSE payloads: numpy scalars and naive datetimes are
+# serialized natively instead of going through str()
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+# SSE frames are batched per client: a batch is sent once the next frame
+# would overflow MAX_BATCH_BYTES, or MAX_BATCH_SECONDS after its first frame
+MAX_BATCH_BYTES = 16 * 1024
+MAX_BATCH_SECONDS = 0.005
+
+# Key under which a Subscriber is told the upstream stream has ended
+_END_OF_STREAM = object()
+
 # Validate API key
 if not DATABENTO_API_KEY or DATABENTO_API_KEY == "your-api-key-here":
     print("⚠️  WARNING: DATABENTO_API_KEY environment variable not set!")
@@ -47,21 +86,372 @@ else:
     print(f"📊 Dataset: {DATASET}")
     print(f"📋 Schema: {SCHEMA}")
 
+# Live client introspection, computed once for the diagnostic endpoints
+LIVE_CLIENT_TYPE = str(db.Live)
+LIVE_PUBLIC_METHODS = tuple(method for method in dir(db.Live) if not method.startswith('_'))
+
 # Test DataBento import and basic functionality
 try:
     print(f"🔍 DataBento version: {db.__version__}")
     print(f"🔍 DataBento Live class: {db.Live}")
-    print(f"🔍 Live class methods: {[method for method in dir(db.Live) if not method.startswith('_')]}")
+    print(f"🔍 Live class methods: {list(LIVE_PUBLIC_METHODS)}")
 except Exception as e:
     print(f"❌ DataBento import issue: {e}")
 
 
-async def stream_price_data(symbols: list[str]) -> AsyncGenerator[str, None]:
+def sse(obj: Any) -> bytes:
+    """Encode an object as a single SSE data frame"""
+    return b"data: " + orjson.dumps(obj, option=ORJSON_OPTIONS) + b"\n\n"
+
+
+def sse_dbn(symbol: str, record: Any) -> bytes:
+    """Encode a raw DBN record as a base64 SSE frame whose event name is its symbol"""
+    return f"event: {symbol}\ndata: ".encode() + base64.b64encode(bytes(record)) + b"\n\n"
+
+
+def _px(raw: int) -> Optional[int]:
+    """Pass a fixed-point DataBento price (units of 1e-9) through, mapping the undefined sentinel to None"""
+    return None if raw == UNDEF_PRICE else raw
+
+
+# Per-symbol MBP-1 frame templates: the symbol and field layout are fixed, so
+# only the numbers are filled in per tick with a C-level bytes %-format
+_MBP1_TEMPLATES: dict[Any, bytes] = {}
+
+
+def _mbp1_template(symbol: Any) -> bytes:
+    """Build the SSE frame template for a symbol's MBP-1 updates"""
+    symbol_json = orjson.dumps(symbol).replace(b"%", b"%%")
+    return (
+        b'data: {"symbol":' + symbol_json
+        + b',"timestamp":%d,"bid_px":%d,"ask_px":%d,"bid_size":%d,"ask_size":%d'
+        + b',"received_at":%d,"record_type":"MBP1Msg"}\n\n'
+    )
+
+
+def _handle_mbp1(record: db.MBP1Msg, symbol: str, received_at: int) -> bytes:
+    """Encode an MBP-1 record as a top-of-book SSE frame"""
+    level = record.levels[0]
+    ts_event = record.ts_event
+    bid_px = level.bid_px
+    ask_px = level.ask_px
+    bid_sz = level.bid_sz
+    ask_sz = level.ask_sz
+    if bid_px == UNDEF_PRICE or ask_px == UNDEF_PRICE:
+        # Empty book side (rare): go through orjson to send null
+        return sse({
+            "symbol": symbol,
+            "timestamp": ts_event,
+            "bid_px": _px(bid_px),
+            "ask_px": _px(ask_px),
+            "bid_size": bid_sz,
+            "ask_size": ask_sz,
+            "received_at": received_at,
+            "record_type": "MBP1Msg"
+        })
+
+    template = _MBP1_TEMPLATES.get(symbol)
+    if template is None:
+        template = _MBP1_TEMPLATES[symbol] = _mbp1_template(symbol)
+    return template % (ts_event, bid_px, ask_px, bid_sz, ask_sz, received_at)
+
+
+def _handle_trade(record: db.TradeMsg, symbol: str, received_at: int) -> bytes:
+    """Encode a trade record as an SSE frame (trades carry no bid/ask)"""
+    return sse({
+        "symbol": symbol,
+        "timestamp": record.ts_event,
+        "bid_px": None,
+        "ask_px": None,
+        "bid_size": None,
+        "ask_size": None,
+        "received_at": received_at,
+        "record_type": "TradeMsg"
+    })
+
+
+def _handle_symbol_mapping(record: db.SymbolMappingMsg, symbol: str, received_at: int) -> None:
+    """Log symbol mappings; they are not forwarded for price display"""
+    logger.debug("Symbol mapping: %s -> %s", record.stype_in_symbol, record.stype_out_symbol)
+
+
+def _handle_other(record: Any, symbol: str, received_at: int) -> None:
+    """Fallback for record types without a handler"""
+    logger.debug("Unhandled record type: %s", type(record).__name__)
+
+
+# Record type -> handler(record, symbol, received_at) returning an encoded SSE frame (or None to skip the record)
+HANDLERS: dict[type, Callable[[Any, str, int], Optional[bytes]]] = {
+    db.MBP1Msg: _handle_mbp1,
+    db.TradeMsg: _handle_trade,
+    db.SymbolMappingMsg: _handle_symbol_mapping,
+}
+
+# Record types sent to clients (their handlers always return a frame); other
+# records are only passed to their handler for logging
+STREAMED_RECORD_TYPES = frozenset({db.MBP1Msg, db.TradeMsg})
+
+
+class Subscriber:
+    """
+    Per-client conflating buffer fed by the shared PriceFeed
+
+    Only the freshest update per (record type, symbol) is kept until the
+    client drains the buffer, so memory is O(#symbols) rather than
+    O(backlog) and a slow client always receives the latest quote.
+
+    Raw subscribers receive the DBN record itself instead of the encoded frame.
+    """
+
+    def __init__(self, symbols: list[str], raw: bool = False):
+        self.symbols = symbols
+        self.raw = raw
+        self.latest: dict = {}
+        self.has_data = asyncio.Event()
+
+    def publish(self, key: Any, payload: Any) -> None:
+        """Replace the pending update for key"""
+        self.latest[key] = payload
+        self.has_data.set()
+
+    def close(self) -> None:
+        """Signal the end of the upstream stream"""
+        self.publish(_END_OF_STREAM, None)
+
+    def discard(self, symbols: list[str]) -> None:
+        """Drop pending updates for symbols the client no longer streams"""
+        for key in [k for k in self.latest if isinstance(k, tuple) and k[1] in symbols]:
+            del self.latest[key]
+        if not self.latest:
+            self.has_data.clear()
+
+    async def drain(self) -> list[tuple[Any, Any]]:
+        """Wait for pending updates and take all of them"""
+        await self.has_data.wait()
+        snapshot = list(self.latest.items())
+        self.latest.clear()
+        self.has_data.clear()
+        return snapshot
+
+
+class PriceFeed:
+    """
+    Single DataBento Live session shared by all streaming clients
+
+    The upstream connection is opened on the first subscription and reused by
+    every client: symbols are subscribed upstream once, and one reader task
+    routes each record to the subscribers registered for its symbol.
+    """
+
+    def __init__(self, key: Optional[str]):
+        self.key = key
+        self.client: Optional[db.Live] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.subscribed: set[str] = set()
+        self.subs: dict[str, set[Subscriber]] = {}
+
+    def subscribe(self, subscriber: Subscriber, symbols: Optional[list[str]] = None) -> None:
+        """
+        Register a subscriber for symbols (default: its own symbol list),
+        subscribing upstream to any symbols not yet streamed
+        """
+        if symbols is None:
+            symbols = subscriber.symbols
+        new_symbols = [s for s in symbols if s not in self.subscribed]
+        if new_symbols:
+            if self.client is None:
+                self.client = db.Live(key=self.key)
+                print("✅ DataBento client initialized")
+            try:
+                self.client.subscribe(
+                    dataset=DATASET,
+                    schema=SCHEMA,
+                    symbols=new_symbols,
+                    stype_in="raw_symbol"
+                )
+            except Exception:
+                # Drop a client that never started streaming so the next
+                # subscription retries with a fresh connection
+                if self.reader is None:
+                    self.client = None
+                    self.subscribed.clear()
+                raise
+            self.subscribed.update(new_symbols)
+            print(f"✅ Successfully subscribed to symbols: {new_symbols}")
+
+        for symbol in symbols:
+            self.subs.setdefault(symbol, set()).add(subscriber)
+            if symbol not in subscriber.symbols:
+                subscriber.symbols.append(symbol)
+
+        if self.reader is None:
+            self.reader = asyncio.create_task(self._read(self.client))
+
+    def unsubscribe(self, subscriber: Subscriber, symbols: Optional[list[str]] = None) -> None:
+        """
+        Deregister a subscriber from symbols (default: all of them); the
+        upstream subscription is kept for reuse
+        """
+        for symbol in list(subscriber.symbols if symbols is None else symbols):
+            subscribers = self.subs.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subs[symbol]
+            if symbols is not None and symbol in subscriber.symbols:
+                subscriber.symbols.remove(symbol)
+        if symbols is not None:
+            subscriber.discard(symbols)
+
+    def _broadcast(self, key: Any, payload: Any) -> None:
+        for subscribers in self.subs.values():
+            for subscriber in subscribers:
+                subscriber.publish(key, payload)
+
+    async def _read(self, client: db.Live) -> None:
+        """Read records from DataBento and route them to subscribers"""
+        # Bind hot-loop globals and attributes to locals (LOAD_FAST instead
+        # of LOAD_GLOBAL / attribute lookups on every record)
+        _time_ns = time.time_ns
+        _type = type
+        _handler_for = HANDLERS.get
+        _handle_default = _handle_other
+        _streamed_types = STREAMED_RECORD_TYPES
+        _symbol_for = client.symbology_map.get
+        _subscribers_for = self.subs.get
+        _debug = logger.debug
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        try:
+            async for record in client:
+                try:
+                    if debug_enabled:
+                        _debug("Received record: %s", record)
+
+                    # Receive time as epoch nanoseconds, taken once per record;
+                    # an int is cheaper to produce and encode than an ISO string
+                    received_at = _time_ns()
+                    instrument_id = record.instrument_id
+                    symbol = _symbol_for(instrument_id, instrument_id)
+                    # Upstream subscriptions outlive their clients, so skip
+                    # decoding and encoding ticks that nobody is listening to
+                    subscribers = _subscribers_for(symbol)
+                    if not subscribers:
+                        continue
+                    record_type = _type(record)
+                    handler = _handler_for(record_type, _handle_default)
+                    if record_type not in _streamed_types:
+                        handler(record, symbol, received_at)
+                        continue
+
+                    # Frames are encoded at most once and shared by every JSON
+                    # subscriber; dbn subscribers get the record itself, so a
+                    # symbol with only dbn subscribers never builds JSON
+                    if debug_enabled:
+                        _debug("Sending %s frame for %s", record_type.__name__, symbol)
+                    key = (record_type, symbol)
+                    frame = None
+                    for subscriber in subscribers:
+                        if subscriber.raw:
+                            subscriber.publish(key, record)
+                            continue
+                        if frame is None:
+                            frame = handler(record, symbol, received_at)
+                        subscriber.publish(key, frame)
+
+                except Exception as record_error:
+                    logger.warning("Error processing record: %s", record_error)
+                    error_data = {
+                        "error": f"Record processing error: {str(record_error)}",
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    self._broadcast("error", error_data)
+
+        except Exception as iteration_error:
+            print(f"❌ Error during iteration: {iteration_error}")
+            error_data = {
+                "error": f"Iteration error: {str(iteration_error)}",
+                "timestamp": datetime.now().isoformat()
+            }
+            self._broadcast("error", error_data)
+        finally:
+            # The session is gone: end every client stream and start over
+            # with a new connection on the next subscription
+            for subscribers in self.subs.values():
+                for subscriber in subscribers:
+                    subscriber.close()
+            self.subs.clear()
+            self.subscribed.clear()
+            self.client = None
+            self.reader = None
+
+    async def close(self) -> None:
+        """Stop the reader task and the DataBento session"""
+        # The reader's cleanup clears self.client, so keep our own reference
+        client = self.client
+        if self.reader is not None:
+            self.reader.cancel()
+            try:
+                await self.reader
+            except asyncio.CancelledError:
+                pass
+        if client is not None:
+            try:
+                client.terminate()
+            except ValueError:
+                pass  # never connected
+        self.client = None
+        print("🧹 DataBento connection cleanup completed")
+
+
+def _connection_error(e: Exception) -> dict:
+    """Build an error message for a failed DataBento connection/subscription"""
+    error_msg = str(e)
+    print(f"❌ DataBento connection error: {error_msg}")
+    
+    # Provide specific guidance for authentication errors
+    if "authentication failed" in error_msg.lower() or "cram" in error_msg.lower():
+        detailed_error = {
+            "error": "DataBento Authentication Failed",
+            "details": "Invalid API key or insufficient permissions for live data",
+            "solutions": [
+                "Verify your API key is correct",
+                "Ensure your key has live data access permissions", 
+                "Check if your key is for live data (not just historical)",
+                "Contact DataBento support if key appears valid"
+            ],
+            "timestamp": datetime.now().isoformat()
+        }
+    elif "nonetype" in error_msg.lower() or "await" in error_msg.lower():
+        detailed_error = {
+            "error": "DataBento Client Initialization Failed",
+            "details": "Client object is None, likely due to subscription failure",
+            "solutions": [
+                "Check if your API key has live data permissions",
+                "Verify the dataset and schema are correct",
+                "Ensure symbols are valid for the dataset",
+                "Check DataBento service status"
+            ],
+            "timestamp": datetime.now().isoformat()
+        }
+    else:
+        detailed_error = {
+            "error": f"DataBento API error: {error_msg}",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    return detailed_error
+
+
+async def stream_price_data(symbols: list[str], raw: bool = False) -> AsyncGenerator[bytes, None]:
     """
     Stream real-time price data from DataBento Live API
 
     Args:
         symbols: List of symbols to subscribe to (e.g., ['ES.FUT', 'NQ.FUT'])
+        raw: Send records as base64-encoded DBN structs instead of JSON
+
+    Yields:
+        Encoded SSE frames, batched per client
     """
     try:
         # Check if API key is available
@@ -71,26 +461,18 @@ async def stream_price_data(symbols: list[str]) -> AsyncGenerator[str, None]:
                 "details": "Please set DATABENTO_API_KEY environment variable to use the live data stream",
                 "timestamp": datetime.now().isoformat()
             }
-            yield f"data: {json.dumps(error_data)}\n\n"
+            yield sse(error_data)
             return
         
         print(f"📊 Dataset: {DATASET}")
         print(f"📋 Schema: {SCHEMA}")
         print(f"🎯 Symbols: {symbols}")
         
-        # Initialize DataBento Live client
-        client = db.Live(key=DATABENTO_API_KEY)
-        print("✅ DataBento client initialized")
-        
-        # Subscribe to symbols with proper parameters (synchronous)
-        print("🔄 Subscribing to symbols...")
-        client.subscribe(
-            dataset=DATASET,
-            schema=SCHEMA,
-            symbols=symbols,
-            stype_in="raw_symbol"
-        )
-        print(f"✅ Successfully subscribed to symbols: {symbols}")
+        # Register with the shared DataBento session (subscribes upstream
+        # only to symbols no other client is streaming yet)
+        feed: PriceFeed = app.state.feed
+        subscriber = Subscriber(symbols, raw)
+        feed.subscribe(subscriber)
 
         print("🔄 Starting data stream...")
         
@@ -102,7 +484,7 @@ async def stream_price_data(symbols: list[str]) -> AsyncGenerator[str, None]:
             "timestamp": datetime.now().isoformat()
         }
         print(f"📤 Sending status message: {status_data}")
-        yield f"data: {json.dumps(status_data)}\n\n"
+        yield sse(status_data)
         
         # Send a test message to verify SSE is working
         test_data = {
@@ -110,142 +492,68 @@ async def stream_price_data(symbols: list[str]) -> AsyncGenerator[str, None]:
             "timestamp": datetime.now().isoformat()
         }
         print(f"🧪 Sending test message: {test_data}")
-        yield f"data: {json.dumps(test_data)}\n\n"
+        yield sse(test_data)
         
-        # Stream data with proper error handling
+        # Coalesce frames into batches so a burst of ticks becomes one ASGI
+        # send; a partial batch is flushed MAX_BATCH_SECONDS after its first
+        # frame, however often new frames keep arriving. Batches are written
+        # into one preallocated buffer per connection, so the only
+        # allocation per batch is the bytes copy handed to ASGI (which
+        # requires bytes; middleware may hold on to the body after send).
+        buf = bytearray(MAX_BATCH_BYTES)
+        view = memoryview(buf)
+        used = 0
+        loop = asyncio.get_running_loop()
+        deadline = 0.0
         try:
-            async for record in client:
+            while True:
                 try:
-                    # Debug: Print raw record to understand structure
-                    print(f"📦 Received record: {type(record)} - {record}")
-                    
-                    # Handle different record types
-                    record_type = type(record).__name__
-                    
-                    if record_type == "SymbolMappingMsg":
-                        # Handle symbol mapping messages
-                        print(f"🗺️ Symbol mapping: {getattr(record, 'stype_in_symbol', 'Unknown')} -> {getattr(record, 'stype_out_symbol', 'Unknown')}")
-                        continue  # Skip symbol mapping messages for price display
-                    
-                    elif record_type in ["MBP1Msg", "MBPMsg", "TradeMsg"]:
-                        # Handle actual price/trade data
-                        # Extract data from MBP1Msg structure
-                        # Get symbol - try different possible fields
-                        symbol = getattr(record, 'symbol', getattr(record, 'instrument_id', 'UNKNOWN'))
-                        timestamp = getattr(record, 'ts_event', getattr(record.hd, 'ts_event', datetime.now()))
-                        
-                        # Extract bid/ask data from levels array
-                        bid_price = None
-                        ask_price = None
-                        bid_size = None
-                        ask_size = None
-                        
-                        if hasattr(record, 'levels') and record.levels and len(record.levels) > 0:
-                            level = record.levels[0]
-                            
-                            # Extract prices - they may be in fixed-point format (int * 1e9)
-                            # If the value is > 1000000, it's likely in fixed-point format, divide by 1e9
-                            raw_bid = level.bid_px if hasattr(level, 'bid_px') else None
-                            raw_ask = level.ask_px if hasattr(level, 'ask_px') else None
-                            
-                            # Convert to float, then check if we need to scale down
-                            if raw_bid is not None:
-                                bid_value = float(raw_bid)
-                                # Check if value seems to be in fixed-point format (very large number)
-                                if bid_value > 1000000:
-                                    bid_price = bid_value / 1e9
-                                else:
-                                    bid_price = bid_value
-                            else:
-                                bid_price = None
-                            
-                            if raw_ask is not None:
-                                ask_value = float(raw_ask)
-                                # Check if value seems to be in fixed-point format (very large number)
-                                if ask_value > 1000000:
-                                    ask_price = ask_value / 1e9
-                                else:
-                                    ask_price = ask_value
-                            else:
-                                ask_price = None
-                            
-                            bid_size = int(level.bid_sz) if hasattr(level, 'bid_sz') and level.bid_sz else None
-                            ask_size = int(level.ask_sz) if hasattr(level, 'ask_sz') and level.ask_sz else None
-                        
-                        data = {
-                            "symbol": str(symbol),
-                            "timestamp": str(timestamp),
-                            "bid_price": bid_price,
-                            "ask_price": ask_price,
-                            "bid_size": bid_size,
-                            "ask_size": ask_size,
-                            "received_at": datetime.now().isoformat(),
-                            "record_type": record_type
-                        }
-
-                        # Always send data to frontend (even if price data is None)
-                        print(f"💰 Sending {record_type} data: {data['symbol']} - Bid: {data['bid_price']}, Ask: {data['ask_price']}")
-                        yield f"data: {json.dumps(data)}\n\n"
-                    
+                    if used:
+                        snapshot = await asyncio.wait_for(subscriber.drain(), max(0, deadline - loop.time()))
                     else:
-                        # Handle other record types
-                        print(f"ℹ️ Unhandled record type: {record_type}")
-                        continue
-                        
-                except Exception as record_error:
-                    print(f"❌ Error processing record: {record_error}")
-                    error_data = {
-                        "error": f"Record processing error: {str(record_error)}",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    yield f"data: {json.dumps(error_data)}\n\n"
-                    
-        except Exception as iteration_error:
-            print(f"❌ Error during iteration: {iteration_error}")
-            error_data = {
-                "error": f"Iteration error: {str(iteration_error)}",
-                "timestamp": datetime.now().isoformat()
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
+                        snapshot = await subscriber.drain()
+                except asyncio.TimeoutError:
+                    yield bytes(view[:used])
+                    used = 0
+                    continue
+
+                for key, payload in snapshot:
+                    if key is _END_OF_STREAM:
+                        if used:
+                            yield bytes(view[:used])
+                        return
+                    if isinstance(payload, bytes):
+                        frame = payload
+                    elif isinstance(payload, dict):
+                        frame = sse(payload)
+                    else:
+                        # Raw DBN record: skip field access and JSON entirely
+                        frame = sse_dbn(key[1], payload)
+
+                    end = used + len(frame)
+                    if end > MAX_BATCH_BYTES:
+                        # Batch is full: flush it and start over
+                        if used:
+                            yield bytes(view[:used])
+                        used = 0
+                        end = len(frame)
+                        if end > MAX_BATCH_BYTES:
+                            yield frame
+                            continue
+                    if not used:
+                        deadline = loop.time() + MAX_BATCH_SECONDS
+                    # Same-size slice assignment never resizes the buffer
+                    buf[used:end] = frame
+                    used = end
+
+                if used and loop.time() >= deadline:
+                    yield bytes(view[:used])
+                    used = 0
+        finally:
+            feed.unsubscribe(subscriber)
 
     except Exception as e:
-        error_msg = str(e)
-        print(f"❌ DataBento connection error: {error_msg}")
-        
-        # Provide specific guidance for authentication errors
-        if "authentication failed" in error_msg.lower() or "cram" in error_msg.lower():
-            detailed_error = {
-                "error": "DataBento Authentication Failed",
-                "details": "Invalid API key or insufficient permissions for live data",
-                "solutions": [
-                    "Verify your API key is correct",
-                    "Ensure your key has live data access permissions", 
-                    "Check if your key is for live data (not just historical)",
-                    "Contact DataBento support if key appears valid"
-                ],
-                "timestamp": datetime.now().isoformat()
-            }
-        elif "nonetype" in error_msg.lower() or "await" in error_msg.lower():
-            detailed_error = {
-                "error": "DataBento Client Initialization Failed",
-                "details": "Client object is None, likely due to subscription failure",
-                "solutions": [
-                    "Check if your API key has live data permissions",
-                    "Verify the dataset and schema are correct",
-                    "Ensure symbols are valid for the dataset",
-                    "Check DataBento service status"
-                ],
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            detailed_error = {
-                "error": f"DataBento API error: {error_msg}",
-                "timestamp": datetime.now().isoformat()
-            }
-            
-        yield f"data: {json.dumps(detailed_error)}\n\n"
-    finally:
-        print("🧹 DataBento connection cleanup completed")
+        yield sse(_connection_error(e))
 
 
 @app.get("/")
@@ -259,7 +567,7 @@ async def root():
 
 
 @app.get("/test-client")
-async def test_client_creation():
+def test_client_creation():
     """Test basic DataBento client creation"""
     if not DATABENTO_API_KEY:
         return {
@@ -273,10 +581,10 @@ async def test_client_creation():
         return {
             "status": "success",
             "message": "Client created successfully",
-            "client_type": str(type(client)),
+            "client_type": LIVE_CLIENT_TYPE,
             "client_id": id(client),
             "has_subscribe": hasattr(client, 'subscribe'),
-            "methods": [method for method in dir(client) if not method.startswith('_')]
+            "methods": LIVE_PUBLIC_METHODS
         }
     except Exception as e:
         return {
@@ -286,31 +594,189 @@ async def test_client_creation():
         }
 
 
+class SSEResponse(Response):
+    """
+    Streaming SSE response that writes chunks straight to the ASGI send callable
+
+    Skips StreamingResponse's per-chunk type checks and task-group wrapper: the
+    body iterator already yields ready-to-send bytes. A receive listener runs
+    alongside so an idle stream is torn down as soon as the client disconnects.
+    """
+
+    media_type = "text/event-stream"
+    default_headers = (
+        (b"content-type", b"text/event-stream; charset=utf-8"),
+        (b"cache-control", b"no-cache"),
+        (b"connection", b"keep-alive"),
+        (b"x-accel-buffering", b"no"),  # Disable nginx buffering
+    )
+
+    def __init__(self, content: AsyncGenerator[bytes, None]):
+        # Per-response list: middleware may append to message["headers"]
+        self.raw_headers = list(self.default_headers)
+        self.body_iterator = content
+        self.status_code = 200
+        self.background = None
+
+    async def _stream(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+        async for chunk in self.body_iterator:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive: Receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        streamer = asyncio.create_task(self._stream(send))
+        listener = asyncio.create_task(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait((streamer, listener), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streamer.cancel()
+            listener.cancel()
+            await asyncio.gather(streamer, listener, return_exceptions=True)
+            await self.body_iterator.aclose()
+
+        if not streamer.cancelled():
+            exc = streamer.exception()
+            # OSError means the client went away mid-send
+            if exc is not None and not isinstance(exc, OSError):
+                raise exc
+
+        if self.background is not None:
+            await self.background()
+
+
+def _clean_symbols(symbols: Any) -> list[str]:
+    """Strip symbol names, dropping blanks and non-string entries"""
+    if not isinstance(symbols, list):
+        return []
+    return [s for s in (t.strip() for t in symbols if isinstance(t, str)) if s]
+
+
+def parse_symbols(symbols: str = "ES.FUT,NQ.FUT") -> list[str]:
+    """
+    Parse the comma-separated symbols query parameter
+
+    Blank entries (e.g. from ",ES.FUT,") are dropped. Used as a dependency so
+    malformed input is rejected before the SSE stream starts.
+    """
+    symbol_list = _clean_symbols(symbols.split(","))
+
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+
+    return symbol_list
+
+
 @app.get("/stream/prices")
-async def stream_prices(symbols: str = "ES.FUT,NQ.FUT"):
+async def stream_prices(
+    symbol_list: list[str] = Depends(parse_symbols),
+    fmt: Literal["json", "dbn"] = Query("json", alias="format"),
+):
     """
     SSE endpoint to stream real-time prices
 
     Query Parameters:
         symbols: Comma-separated list of symbols (e.g., "ES.FUT,NQ.FUT")
+        format: "json" (default) or "dbn" for base64-encoded raw DBN records
 
     Returns:
         Server-Sent Events stream with real-time price data
     """
-    symbol_list = [s.strip() for s in symbols.split(",")]
+    # Frames are already encoded bytes, so they are written to the ASGI
+    # send callable without any further serialization
+    return SSEResponse(stream_price_data(symbol_list, raw=fmt == "dbn"))
 
-    if not symbol_list:
-        raise HTTPException(status_code=400, detail="At least one symbol is required")
 
-    return StreamingResponse(
-        stream_price_data(symbol_list),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        }
-    )
+@app.websocket("/ws/prices")
+async def ws_prices(websocket: WebSocket):
+    """
+    WebSocket endpoint to stream real-time prices
+
+    Recommended for high-rate use: no SSE framing, every symbol on one
+    socket, and symbols can be added or removed without reconnecting.
+
+    Client messages (JSON):
+        {"subscribe": ["ESZ5", ...]} and/or {"unsubscribe": ["ESZ5", ...]}
+
+    Server messages (binary frames holding UTF-8 JSON):
+        Price updates in the same shape as /stream/prices, plus status and
+        error messages
+    """
+    await websocket.accept()
+
+    if not DATABENTO_API_KEY:
+        await websocket.send_bytes(orjson.dumps({
+            "error": "DATABENTO_API_KEY environment variable not set",
+            "details": "Please set DATABENTO_API_KEY environment variable to use the live data stream",
+            "timestamp": datetime.now().isoformat()
+        }))
+        await websocket.close()
+        return
+
+    feed: PriceFeed = websocket.app.state.feed
+    subscriber = Subscriber([])
+
+    async def handle_commands() -> None:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                command = orjson.loads(message.get("bytes") or message.get("text") or b"")
+            except orjson.JSONDecodeError:
+                command = None
+            if not isinstance(command, dict):
+                await websocket.send_bytes(orjson.dumps({
+                    "error": 'Expected a JSON object like {"subscribe": ["ESZ5"]}',
+                    "timestamp": datetime.now().isoformat()
+                }))
+                continue
+
+            unsubscribe = _clean_symbols(command.get("unsubscribe"))
+            if unsubscribe:
+                feed.unsubscribe(subscriber, unsubscribe)
+            subscribe = _clean_symbols(command.get("subscribe"))
+            if subscribe:
+                try:
+                    feed.subscribe(subscriber, subscribe)
+                except Exception as e:
+                    await websocket.send_bytes(orjson.dumps(_connection_error(e)))
+                    continue
+
+            await websocket.send_bytes(orjson.dumps({
+                "status": "subscribed",
+                "symbols": subscriber.symbols,
+                "timestamp": datetime.now().isoformat()
+            }))
+
+    async def send_updates() -> None:
+        while True:
+            for key, payload in await subscriber.drain():
+                if key is _END_OF_STREAM:
+                    return
+                if isinstance(payload, bytes):
+                    # Shared SSE frame: strip the "data: " prefix and "\n\n"
+                    await websocket.send_bytes(payload[6:-2])
+                else:
+                    await websocket.send_bytes(orjson.dumps(payload, option=ORJSON_OPTIONS))
+
+    commands = asyncio.create_task(handle_commands())
+    updates = asyncio.create_task(send_updates())
+    try:
+        await asyncio.wait((commands, updates), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        commands.cancel()
+        updates.cancel()
+        await asyncio.gather(commands, updates, return_exceptions=True)
+        feed.unsubscribe(subscriber)
+
+    if websocket.client_state == WebSocketState.CONNECTED:
+        await websocket.close()
 
 
 @app.get("/symbols")
@@ -329,7 +795,7 @@ async def get_available_symbols():
 
 
 @app.get("/test-connection")
-async def test_databento_connection():
+def test_databento_connection():
     """Test DataBento API connection"""
     if not DATABENTO_API_KEY:
         return {
@@ -344,8 +810,8 @@ async def test_databento_connection():
     try:
         # Test basic client initialization
         client = db.Live(key=DATABENTO_API_KEY)
-        print(f"✅ Client created: {type(client)}")
-        print(f"🔍 Client attributes: {dir(client)}")
+        print(f"✅ Client created: {LIVE_CLIENT_TYPE}")
+        print(f"🔍 Client methods: {list(LIVE_PUBLIC_METHODS)}")
         
         # Check if subscribe method exists and is callable
         if hasattr(client, 'subscribe'):
@@ -356,7 +822,7 @@ async def test_databento_connection():
             return {
                 "status": "error",
                 "message": "Subscribe method not found on client",
-                "client_methods": [method for method in dir(client) if not method.startswith('_')]
+                "client_methods": LIVE_PUBLIC_METHODS
             }
         
         # Test subscription with error handling (without await)
@@ -377,7 +843,7 @@ async def test_databento_connection():
                 "api_key_set": DATABENTO_API_KEY != "your-api-key-here",
                 "dataset": DATASET,
                 "schema": SCHEMA,
-                "client_type": str(type(client)),
+                "client_type": LIVE_CLIENT_TYPE,
                 "subscription_result": str(result)
             }
         except Exception as sub_error:
@@ -404,13 +870,23 @@ async def test_databento_connection():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
 
-    # Run the server
+    # RELOAD=true for development only; reload runs a single worker process.
+    # In production leave it off and set WORKERS for process-level parallelism
+    # (each worker holds its own DataBento session).
+    reload = os.getenv("RELOAD", "false").lower() == "true"
+
+    # Run the server on uvloop + httptools: lower per-send overhead for the
+    # many small writes of an SSE stream (uvloop is unavailable on Windows)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
+        reload=reload,
+        workers=None if reload else int(os.getenv("WORKERS", "1")),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info"
     )
@@ -3,16 +3,22 @@ import './PriceMonitor.css';
 
 interface PriceData {
   symbol: string;
-  timestamp: string;
+  timestamp: number;
   bid_price: number | null;
   ask_price: number | null;
   bid_size: number | null;
   ask_size: number | null;
-  received_at: string;
+  received_at: number;
   record_type?: string;
   error?: string;
 }
 
+// Backend prices are fixed-point integers in units of 1e-9
+const PRICE_SCALE = 1e-9;
+
+const scalePrice = (px: number | null | undefined): number | null =>
+  px === null || px === undefined ? null : px * PRICE_SCALE;
+
 interface PriceMap {
   [symbol: string]: PriceData;
 }
@@ -64,13 +70,13 @@ const PriceMonitor = () => {
         }
 
         // Handle price data
-        if (data.symbol && (data.bid_price !== null || data.ask_price !== null)) {
+        if (data.symbol && (data.bid_px !== null || data.ask_px !== null)) {
           console.log('💰 Processing price data for symbol:', data.symbol);
           const priceData: PriceData = {
             symbol: data.symbol,
             timestamp: data.timestamp,
-            bid_price: data.bid_price,
-            ask_price: data.ask_price,
+            bid_price: scalePrice(data.bid_px),
+            ask_price: scalePrice(data.ask_px),
             bid_size: data.bid_size,
             ask_size: data.ask_size,
             received_at: data.received_at,
@@ -131,12 +137,9 @@ const PriceMonitor = () => {
     return price.toFixed(2);
   };
 
-  const formatTimestamp = (timestamp: string): string => {
-    try {
-      return new Date(timestamp).toLocaleTimeString();
-    } catch {
-      return timestamp;
-    }
+  // Backend timestamps are UNIX epoch nanoseconds
+  const formatTimestamp = (timestampNs: number): string => {
+    return new Date(timestampNs / 1e6).toLocaleTimeString();
   };
 
   const getSpread = (bid: number | null, ask: number | null): string => {